@@ -136,6 +136,9 @@ copy_files() {
     # Copy Python scripts
     sudo cp "$SCRIPT_DIR/wifi_auto_login.py" "$INSTALL_DIR/"
     sudo cp "$SCRIPT_DIR/wifi_detector.py" "$INSTALL_DIR/"
+    sudo cp "$SCRIPT_DIR/wifi_trace.py" "$INSTALL_DIR/"
+    sudo cp "$SCRIPT_DIR/wifi_state.py" "$INSTALL_DIR/"
+    sudo cp "$SCRIPT_DIR/wifi_replay.py" "$INSTALL_DIR/"
     
     # Copy bash script
     sudo cp "$SCRIPT_DIR/wifi_auto_login.sh" "$INSTALL_DIR/"
@@ -177,6 +180,7 @@ WorkingDirectory=$INSTALL_DIR
 ExecStart=/usr/bin/python3 $INSTALL_DIR/wifi_auto_login.py --daemon
 Restart=always
 RestartSec=10
+RuntimeDirectory=wifi_auto_login
 StandardOutput=journal
 StandardError=journal
 
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test Replay Fixture
+Untuk mengetes record/replay sesi portal secara offline
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from wifi_replay import (REDACTED, RecordingSession, ReplayMismatch, ReplaySession,
+                         load_fixture, make_replay_client, redact_url, verify_fixture)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.json')))
+
+PORTAL_PAGE = '''<html><body>
+<form action="/login" method="post">
+<input type="hidden" name="dst" value="">
+<input type="text" name="username">
+<input type="password" name="password">
+</form>
+</body></html>'''
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    """Portal palsu untuk test perekaman"""
+
+    def _reply(self, body):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(PORTAL_PAGE)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self._reply('<html><body>Selamat datang, rahasia-user!</body></html>')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def portal_url():
+    server = HTTPServer(('127.0.0.1', 0), PortalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('fixture_path', FIXTURES, ids=os.path.basename)
+def test_replay_login(fixture_path, tmp_path):
+    """Pipeline login() lengkap berhasil dari fixture"""
+    client = make_replay_client(fixture_path, str(tmp_path / 'config.json'))
+
+    assert client.login()
+    assert client.session.misses == []
+    assert client.session.remaining() == []
+
+
+@pytest.mark.parametrize('fixture_path', FIXTURES, ids=os.path.basename)
+def test_replay_find_login_form(fixture_path, tmp_path):
+    """find_login_form dan submit_login bekerja pada halaman rekaman"""
+    client = make_replay_client(fixture_path, str(tmp_path / 'config.json'))
+
+    response = client.get_hotspot_login_page()
+    form = client.find_login_form(response)
+    assert form is not None
+    assert form.find('input', {'type': 'password'}) is not None
+
+    login_response = client.submit_login(form, response)
+    assert login_response is not None
+    assert client.session.misses == []
+
+
+def test_record_redacts_credentials(portal_url, tmp_path):
+    """Rekaman tidak menyimpan kredensial dan bisa di-replay"""
+    session = RecordingSession(secrets=['rahasia-user', 's3cret'])
+    session.get(portal_url)
+    session.post(portal_url + 'login', data={'username': 'rahasia-user', 'password': 's3cret', 'dst': ''})
+
+    path = str(tmp_path / 'portal.json.gz')
+    session.save(path)
+    fixture = load_fixture(path)
+    raw = json.dumps(fixture)
+
+    assert 'rahasia-user' not in raw
+    assert 's3cret' not in raw
+    assert fixture['entries'][1]['data'] == {'username': REDACTED, 'password': REDACTED, 'dst': ''}
+
+    replay = ReplaySession(fixture)
+    assert replay.get(portal_url).text == PORTAL_PAGE
+    assert REDACTED in replay.post(portal_url + 'login', data={}).text
+
+
+@pytest.mark.parametrize('text, secrets', [
+    ('Selamat datang, budi.', ['budi']),
+    ('user budi/admin', ['budi']),
+    ('pw: s3cret.', ['s3cret']),
+    ('username=budi%40x.id', ['budi@x.id']),
+    ('username=budi%40x.id&next=1', ['budi@x.id']),
+    ('<b>a&amp;b</b>', ['a&b']),
+])
+def test_redact_variants(text, secrets):
+    """Kredensial disensor dalam semua bentuk, termasuk URL-encoded"""
+    session = RecordingSession(secrets=secrets)
+    redacted = session.redact(text)
+
+    assert REDACTED in redacted
+    for secret in secrets:
+        assert secret not in redacted
+    assert 'budi%40x.id' not in redacted
+
+
+def test_redact_keeps_visited_hosts():
+    """Hostname yang dikunjungi tidak ikut disensor"""
+    session = RecordingSession(secrets=['padang'])
+    session.add_host('http://hotspot.padang.go.id/login')
+
+    redacted = session.redact('<form action="http://hotspot.padang.go.id/login">Halo padang</form>')
+    assert redacted == f'<form action="http://hotspot.padang.go.id/login">Halo {REDACTED}</form>'
+
+
+def test_redact_keeps_unrelated_fields():
+    """Kredensial pendek tidak merusak nama field atau nilai lain di halaman"""
+    session = RecordingSession(secrets=['user', '12'])
+    page = ('<input type="text" name="username">'
+            '<input type="hidden" name="dst" value="http://a/?id=12&x=120">'
+            '<p>Kuota 120 MB, user 12</p>')
+
+    redacted = session.redact(page)
+    assert '<input type="text" name="username">' in redacted
+    assert f'value="http://a/?id={REDACTED}&x=120"' in redacted
+    assert f'<p>Kuota 120 MB, {REDACTED} {REDACTED}</p>' in redacted
+    assert session._redact_data({'dst': 'http://a/?id=12', 'username': 'user', 'code': '12'}) == {
+        'dst': 'http://a/?id=12', 'username': REDACTED, 'code': REDACTED
+    }
+
+
+def test_record_warns_credential_before_login(portal_url, caplog):
+    """Kredensial yang sudah ada di halaman sebelum login diperingatkan"""
+    session = RecordingSession(secrets=['password'])
+    with caplog.at_level('WARNING', logger='wifi_replay'):
+        session.get(portal_url)
+    assert 'sebelum login' in caplog.text
+
+
+@pytest.mark.parametrize('fixture_path', FIXTURES, ids=os.path.basename)
+def test_verify_fixture(fixture_path):
+    """Fixture hasil rekaman diverifikasi dengan replay login sekali"""
+    assert verify_fixture(load_fixture(fixture_path)) == []
+    assert verify_fixture({'version': 1, 'meta': {}, 'entries': []}) != []
+
+
+def test_replay_matches_redacted_query_value():
+    """Parameter query berisi kredensial cocok saat replay dengan kredensial client"""
+    recorded = redact_url('http://portal/login?uid=budi&lang=id', ['budi'])
+    assert recorded == f'http://portal/login?uid={REDACTED}&lang=id'
+
+    replay = ReplaySession({'version': 1, 'entries': [
+        {'method': 'GET', 'url': recorded, 'status': 200, 'final_url': recorded, 'body': 'ok'}
+    ]}, secrets=['replay'])
+    assert replay.get('http://portal/login?uid=replay&lang=id').text == 'ok'
+
+
+def test_replay_mismatch():
+    """Request yang tidak direkam dianggap tidak ada jaringan"""
+    replay = ReplaySession({'version': 1, 'entries': []})
+
+    with pytest.raises(ReplayMismatch):
+        replay.get('http://hotspot.padang.go.id')
+    assert replay.misses == [('GET', 'http://hotspot.padang.go.id')]
+
+
+def test_replay_realtime():
+    """Mode realtime mengikuti timing asli rekaman"""
+    fixture = {'version': 1, 'entries': [
+        {'method': 'GET', 'url': 'http://8.8.8.8', 'offset': 0.0, 'elapsed': 0.2, 'error': 'ConnectTimeout'}
+    ]}
+
+    replay = ReplaySession(fixture, realtime=True)
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        replay.get('http://8.8.8.8')
+    assert time.monotonic() - start >= 0.2
+
+
+def test_replay_cli_has_no_side_effects(tmp_path, monkeypatch):
+    """--replay tidak menulis ke config asli maupun file state daemon"""
+    import wifi_auto_login
+
+    config_file = tmp_path / 'config.json'
+    state_file = tmp_path / 'state.json'
+    config_file.write_text(json.dumps({
+        'hotspot_url': 'http://hotspot.padang.go.id', 'username': 'a', 'password': 'b',
+        'timeout': 10, 'state_file': str(state_file)
+    }))
+    original = config_file.read_text()
+
+    monkeypatch.setattr('sys.argv', ['wifi_auto_login.py', '--config', str(config_file), '--replay', FIXTURES[0]])
+    wifi_auto_login.main()
+
+    assert config_file.read_text() == original
+    assert not state_file.exists()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test Network State
+Untuk mengetes cache TTL dan snapshot bersama status jaringan
+"""
+
+import json
+import time
+
+import pytest
+import requests
+
+import wifi_detector
+from wifi_state import NetworkState
+
+
+class Counter:
+    """Checker palsu yang menghitung jumlah pemanggilan"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.value
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    interfaces = Counter(['wlan0'])
+    network = Counter({'interface': 'wlan0', 'ssid': 'Hotspot', 'connected': True, 'signal_level': '-60'})
+    monkeypatch.setattr(wifi_detector, 'get_wifi_interfaces', interfaces)
+    monkeypatch.setattr(wifi_detector, 'get_current_wifi_network', network)
+    return interfaces, network
+
+
+def test_field_cached_within_ttl(detector):
+    """Field tidak dicek ulang selama belum kedaluwarsa"""
+    connected = Counter(True)
+    state = NetworkState(state_file=None, checks={'connected': connected})
+
+    assert state.get('connected') is True
+    assert state.get('connected') is True
+    assert connected.calls == 1
+
+    state.invalidate('connected')
+    assert state.get('connected') is True
+    assert connected.calls == 2
+
+
+def test_stale_field_refreshed(detector):
+    """Field dengan TTL habis di-refresh pada pembacaan berikutnya"""
+    connected = Counter(False)
+    state = NetworkState(ttl={'connected': 0}, state_file=None, checks={'connected': connected})
+
+    state.get('connected')
+    state.get('connected')
+    assert connected.calls == 2
+
+
+def test_network_info_reuses_interfaces(detector):
+    """Interface hanya dideteksi sekali untuk network_info()"""
+    interfaces, network = detector
+    state = NetworkState(state_file=None, checks={'is_hotspot': Counter(True)})
+
+    info = state.network_info()
+    assert info['wifi_interfaces'] == ['wlan0']
+    assert info['current_network']['ssid'] == 'Hotspot'
+    assert info['is_hotspot'] is True
+
+    state.network_info()
+    assert interfaces.calls == 1
+    assert network.calls == 1
+
+
+def test_state_shared_through_file(detector, tmp_path):
+    """Hasil cek satu proses dipakai ulang oleh proses lain lewat file state"""
+    state_file = str(tmp_path / 'state.json')
+    first = NetworkState(state_file=state_file, checks={'connected': Counter(True)})
+    first.get('connected')
+
+    checker = Counter(False)
+    second = NetworkState(state_file=state_file, checks={'connected': checker})
+    assert second.get('connected') is True
+    assert checker.calls == 0
+
+
+def test_snapshot_json(detector):
+    """Snapshot dan umurnya tersedia dalam format JSON"""
+    state = NetworkState(state_file=None, checks={'connected': Counter(True), 'is_hotspot': Counter(False)})
+
+    snapshot = json.loads(state.to_json())
+    assert set(snapshot) == {'interfaces', 'network', 'connected', 'is_hotspot'}
+    assert snapshot['network']['value']['ssid'] == 'Hotspot'
+    assert snapshot['connected']['age'] >= 0
+    assert snapshot['connected']['stale'] is False
+
+    unread = NetworkState(state_file=None).snapshot(refresh=False)
+    assert unread['connected'] == {'value': None, 'age': None, 'ttl': 15, 'stale': True}
+
+
+def test_future_timestamp_rejected(detector, tmp_path):
+    """Field dengan waktu update di masa depan tidak dipercaya"""
+    state_file = tmp_path / 'state.json'
+    state_file.write_text(json.dumps({'fields': {'connected': {'value': True, 'updated': time.time() + 3600}}}))
+    state_file.chmod(0o644)
+
+    checker = Counter(False)
+    state = NetworkState(state_file=str(state_file), checks={'connected': checker})
+    assert state.get('connected') is False
+    assert checker.calls == 1
+
+
+def test_clock_step_back_is_stale(detector):
+    """Umur negatif setelah jam mundur dianggap kedaluwarsa"""
+    checker = Counter(True)
+    state = NetworkState(state_file=None, checks={'connected': checker})
+    state.get('connected')
+    state._updated['connected'] = time.time() + 3600
+
+    assert state.is_stale('connected')
+    state.get('connected')
+    assert checker.calls == 2
+
+
+def test_insecure_state_file_ignored(detector, tmp_path):
+    """File state yang bisa ditulis semua user diabaikan"""
+    state_file = tmp_path / 'state.json'
+    state_file.write_text(json.dumps({'fields': {'connected': {'value': True, 'updated': time.time()}}}))
+    state_file.chmod(0o666)
+
+    checker = Counter(False)
+    state = NetworkState(state_file=str(state_file), checks={'connected': checker})
+    assert state.get('connected') is False
+    assert checker.calls == 1
+
+
+class FakeSession:
+    """Session palsu untuk probe captive portal"""
+
+    def __init__(self, final_url=None):
+        self.final_url = final_url
+
+    def get(self, url, timeout=None):
+        if self.final_url is None:
+            raise requests.exceptions.ConnectionError(url)
+        return type('Response', (), {'url': self.final_url})()
+
+
+def test_hotspot_probe_shared_semantics():
+    """Probe captive portal: redirect ke login berarti hotspot, request gagal tidak"""
+    assert wifi_detector.check_hotspot_connection(FakeSession('http://hotspot.padang.go.id/login')) is True
+    assert wifi_detector.check_hotspot_connection(FakeSession('http://www.google.com/')) is False
+    assert wifi_detector.check_hotspot_connection(FakeSession()) is False
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test Trace Mode
+Untuk mengetes span, export Chrome trace dan collapsed stacks
+"""
+
+import glob
+import json
+import os
+import signal
+import time
+
+import pytest
+import requests
+
+from wifi_replay import make_replay_client
+from wifi_trace import (TRACER, handle_toggle_request, install_signal_handler, span,
+                        stop_and_dump, traced)
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', '*.json')))
+
+
+@pytest.fixture
+def tracer():
+    TRACER.clear()
+    yield TRACER
+    TRACER.stop()
+    TRACER.clear()
+
+
+@traced('outer')
+def outer():
+    with span('inner', step=1):
+        time.sleep(0.01)
+
+
+def test_disabled_records_nothing(tracer):
+    """Tanpa trace mode tidak ada span yang dicatat"""
+    outer()
+    assert list(tracer.events) == []
+    assert tracer.collapsed_stacks() == []
+
+
+def test_nested_spans(tracer):
+    """Span bersarang menghasilkan Chrome trace dan collapsed stacks"""
+    tracer.start()
+    outer()
+    tracer.stop()
+
+    events = {event['name']: event for event in tracer.chrome_trace()['traceEvents']}
+    assert set(events) == {'outer', 'inner'}
+    assert events['inner']['ph'] == 'X'
+    assert events['inner']['args'] == {'step': 1}
+    assert events['inner']['dur'] >= 10000
+    assert events['outer']['dur'] >= events['inner']['dur']
+
+    paths = [line.rsplit(' ', 1)[0] for line in tracer.collapsed_stacks()]
+    assert paths == ['outer', 'outer;inner']
+
+
+def test_span_records_error(tracer):
+    """Span tetap dicatat saat terjadi exception"""
+    tracer.start()
+    with pytest.raises(ValueError):
+        with span('failing'):
+            raise ValueError('boom')
+    tracer.stop()
+
+    assert tracer.events[0]['args'] == {'error': 'ValueError'}
+
+
+@pytest.mark.parametrize('fixture_path', FIXTURES, ids=os.path.basename)
+def test_login_trace(tracer, fixture_path, tmp_path):
+    """Pipeline login() menghasilkan span untuk setiap tahap"""
+    client = make_replay_client(fixture_path, str(tmp_path / 'config.json'))
+
+    tracer.start(sampling=True, interval=0.001)
+    assert client.login()
+    tracer.stop()
+
+    names = {event['name'] for event in tracer.events}
+    assert {'login', 'get_hotspot_login_page', 'find_login_form', 'bs4_parse',
+            'submit_login', 'check_internet_connection', 'probe'} <= names
+
+    paths = tracer.dump(str(tmp_path))
+    with open(paths[0]) as f:
+        assert json.load(f)['traceEvents']
+    with open(paths[1]) as f:
+        assert 'login;find_login_form;bs4_parse ' in f.read()
+
+
+def burn(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_sampling_cpu_time(tracer):
+    """Sampling profiler hanya mencatat waktu CPU, bukan waktu tidur"""
+    tracer.start(sampling=True, interval=0.001)
+    burn(0.1)
+    time.sleep(0.2)
+    tracer.stop()
+
+    samples = tracer.samples
+    assert any(path.endswith(':burn') for path in samples)
+    assert sum(samples.values()) < 150
+
+
+def test_signal_toggle(tracer, tmp_path):
+    """SIGUSR2 hanya memasang flag; toggle dan dump dilakukan di luar handler"""
+    previous = signal.getsignal(signal.SIGUSR2)
+    install_signal_handler()
+    try:
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert not tracer.enabled
+        assert handle_toggle_request(str(tmp_path)) == []
+        assert tracer.enabled
+
+        outer()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        paths = handle_toggle_request(str(tmp_path))
+        assert not tracer.enabled
+        assert len(paths) == 2 and all(os.path.exists(path) for path in paths)
+        assert handle_toggle_request(str(tmp_path)) == []
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+
+def test_stop_and_dump_unwritable_dir(tracer, tmp_path):
+    """Gagal menulis trace hanya dicatat, tracer tetap dimatikan"""
+    blocker = tmp_path / 'bukan_direktori'
+    blocker.write_text('')
+
+    assert stop_and_dump(str(tmp_path)) == []
+    tracer.start()
+    outer()
+    assert stop_and_dump(str(blocker / 'trace')) == []
+    assert not tracer.enabled
+
+
+class CountingResponse(requests.Response):
+    """Response yang menghitung berapa kali body di-decode"""
+
+    decodes = 0
+
+    @property
+    def text(self):
+        self.decodes += 1
+        return super().text
+
+
+def test_parse_decodes_body_once(tracer, tmp_path):
+    """Saat trace mati, body hanya di-decode sekali per parsing"""
+    client = make_replay_client(FIXTURES[0], str(tmp_path / 'config.json'))
+    page = client.get_hotspot_login_page()
+
+    response = CountingResponse()
+    response._content = page.content
+    response.encoding = page.encoding
+    response.url = page.url
+    form = client.find_login_form(response)
+    assert form is not None
+    assert response.decodes == 1
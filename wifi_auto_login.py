@@ -10,9 +10,15 @@ import json
 import os
 import sys
 import logging
+import signal
+import tempfile
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
+from wifi_trace import TRACER, DEFAULT_TRACE_DIR, span, traced, install_signal_handler, handle_toggle_request, stop_and_dump
+from wifi_state import NetworkState, DEFAULT_STATE_FILE
+import wifi_detector
+
 # Konfigurasi logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +31,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class WiFiAutoLogin:
-    def __init__(self, config_file='/etc/wifi_auto_login/config.json'):
+    def __init__(self, config_file='/etc/wifi_auto_login/config.json', session=None):
         self.config_file = config_file
-        self.session = requests.Session()
+        # Session bisa diganti, misal RecordingSession/ReplaySession dari wifi_replay
+        self.session = session if session is not None else requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -35,6 +42,15 @@ class WiFiAutoLogin:
         self.last_login_time = None
         self.reconnect_interval = 3 * 60 * 60  # 3 jam dalam detik
         self.load_last_login_time()
+        # Snapshot status jaringan yang dipakai bersama dengan wifi_detector
+        self.network_state = NetworkState(
+            ttl=self.config.get('state_ttl'),
+            state_file=self.config.get('state_file', DEFAULT_STATE_FILE),
+            checks={
+                'connected': self.check_internet_connection,
+                'is_hotspot': self.check_hotspot_captive_portal
+            }
+        )
         
     def load_config(self):
         """Load konfigurasi dari file JSON"""
@@ -52,7 +68,12 @@ class WiFiAutoLogin:
                     "max_retries": 3,
                     "timeout": 10,
                     "auto_reconnect_interval": 3 * 60 * 60,  # 3 jam dalam detik
-                    "force_reconnect": True
+                    "force_reconnect": True,
+                    "trace": False,
+                    "trace_dir": DEFAULT_TRACE_DIR,
+                    "trace_sampling": False,
+                    "trace_sample_interval": 0.005,
+                    "state_file": DEFAULT_STATE_FILE
                 }
                 self.save_config(default_config)
                 return default_config
@@ -93,7 +114,7 @@ class WiFiAutoLogin:
         """Dapatkan informasi status koneksi dan reconnect"""
         current_time = datetime.now()
         status_info = {
-            'internet_connected': self.check_internet_connection(),
+            'internet_connected': self.network_state.get('connected'),
             'last_login_time': self.last_login_time,
             'current_time': current_time,
             'force_reconnect_enabled': self.config.get('force_reconnect', True),
@@ -112,31 +133,17 @@ class WiFiAutoLogin:
         
         return status_info
     
+    @traced('check_internet_connection')
     def check_internet_connection(self):
         """Cek apakah sudah terhubung ke internet"""
-        try:
-            # Coba akses Google DNS
-            response = self.session.get('http://8.8.8.8', timeout=5)
-            return True
-        except:
-            try:
-                # Coba akses Cloudflare DNS
-                response = self.session.get('http://1.1.1.1', timeout=5)
-                return True
-            except:
-                return False
+        return wifi_detector.check_internet_connection(self.session)
     
+    @traced('check_hotspot_captive_portal')
     def check_hotspot_captive_portal(self):
         """Cek apakah ada captive portal"""
-        try:
-            # Coba akses situs yang biasanya diblokir oleh captive portal
-            response = self.session.get('http://www.google.com', timeout=5)
-            if 'hotspot' in response.url.lower() or 'login' in response.url.lower():
-                return True
-            return False
-        except:
-            return True
+        return wifi_detector.check_hotspot_connection(self.session)
     
+    @traced('get_hotspot_login_page')
     def get_hotspot_login_page(self):
         """Dapatkan halaman login hotspot"""
         try:
@@ -147,11 +154,15 @@ class WiFiAutoLogin:
             logger.error(f"Error accessing hotspot login page: {e}")
             return None
     
+    @traced('find_login_form')
     def find_login_form(self, response):
         """Temukan form login dalam halaman"""
         try:
             from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Decode body sekali saja (requests tidak meng-cache response.text)
+            html = response.text
+            with span('bs4_parse', size=len(html)):
+                soup = BeautifulSoup(html, 'html.parser')
             
             # Cari form login
             forms = soup.find_all('form')
@@ -172,11 +183,15 @@ class WiFiAutoLogin:
             logger.error(f"Error parsing login form: {e}")
             return None
     
+    @traced('submit_login')
     def submit_login(self, form, response):
         """Submit form login"""
         try:
             from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Decode body sekali saja (requests tidak meng-cache response.text)
+            html = response.text
+            with span('bs4_parse', size=len(html)):
+                soup = BeautifulSoup(html, 'html.parser')
             
             # Dapatkan action URL
             action_url = form.get('action')
@@ -211,6 +226,7 @@ class WiFiAutoLogin:
             logger.error(f"Error submitting login form: {e}")
             return None
     
+    @traced('login')
     def login(self, force_reconnect=False):
         """Proses login utama"""
         if not self.config.get('username') or not self.config.get('password'):
@@ -235,7 +251,10 @@ class WiFiAutoLogin:
                 return False
             
             # Cek apakah login berhasil
-            if self.check_internet_connection():
+            connected = self.check_internet_connection()
+            self.network_state.set('connected', connected)
+            if connected:
+                self.network_state.set('is_hotspot', False)
                 self.last_login_time = datetime.now()
                 self.save_last_login_time()
                 if force_reconnect:
@@ -251,10 +270,47 @@ class WiFiAutoLogin:
             logger.error(f"Error during login process: {e}")
             return False
     
+    def start_trace(self, sampling=None):
+        """Aktifkan trace mode sesuai konfigurasi"""
+        if sampling is None:
+            sampling = self.config.get('trace_sampling', False)
+        TRACER.start(sampling=sampling,
+                     interval=self.config.get('trace_sample_interval', 0.005))
+    
+    def stop_trace(self):
+        """Matikan trace mode dan tulis hasilnya ke trace_dir"""
+        return stop_and_dump(self.config.get('trace_dir', DEFAULT_TRACE_DIR))
+    
+    def handle_trace_toggle(self):
+        """Proses permintaan toggle trace mode dari SIGUSR2 (di luar signal handler)"""
+        handle_toggle_request(self.config.get('trace_dir', DEFAULT_TRACE_DIR),
+                              sampling=self.config.get('trace_sampling', False),
+                              interval=self.config.get('trace_sample_interval', 0.005))
+    
+    def wait(self, seconds):
+        """Tunggu sambil tetap melayani toggle trace mode"""
+        deadline = time.monotonic() + seconds
+        while True:
+            self.handle_trace_toggle()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(1, remaining))
+    
+    def handle_sigterm(self, signum, frame):
+        """Ubah SIGTERM (systemctl stop) menjadi exit normal agar trace tetap ditulis"""
+        raise SystemExit(0)
+    
     def run_daemon(self):
         """Jalankan sebagai daemon untuk terus memantau koneksi"""
         logger.info("Memulai WiFi Auto Login Daemon dengan auto reconnect 3 jam")
         
+        # Trace mode bisa di-toggle saat runtime: kill -USR2 <pid>
+        install_signal_handler()
+        signal.signal(signal.SIGTERM, self.handle_sigterm)
+        if self.config.get('trace', False):
+            self.start_trace()
+        
         while True:
             try:
                 current_time = datetime.now()
@@ -268,7 +324,7 @@ class WiFiAutoLogin:
                     force_reconnect_needed = True
                 
                 # Cek apakah sudah terhubung ke internet
-                if not self.check_internet_connection() or force_reconnect_needed:
+                if not self.network_state.get('connected') or force_reconnect_needed:
                     if force_reconnect_needed:
                         logger.info("Melakukan force reconnect untuk menghindari expire login...")
                     else:
@@ -279,19 +335,24 @@ class WiFiAutoLogin:
                         logger.info(f"Percobaan login ke-{attempt + 1}")
                         if self.login(force_reconnect=force_reconnect_needed):
                             break
-                        time.sleep(2)
+                        self.wait(2)
                 else:
                     logger.debug("Internet sudah terhubung")
                 
                 # Tunggu sebelum cek lagi
-                time.sleep(self.config.get('check_interval', 30))
+                self.wait(self.config.get('check_interval', 30))
                 
             except KeyboardInterrupt:
                 logger.info("Daemon dihentikan oleh user")
+                self.stop_trace()
                 break
+            except SystemExit:
+                logger.info("Daemon dihentikan (SIGTERM)")
+                self.stop_trace()
+                raise
             except Exception as e:
                 logger.error(f"Error in daemon: {e}")
-                time.sleep(10)
+                self.wait(10)
 
 def main():
     """Main function"""
@@ -306,13 +367,68 @@ def main():
                        help='Setup konfigurasi awal')
     parser.add_argument('--status', action='store_true', 
                        help='Tampilkan status koneksi dan reconnect')
+    parser.add_argument('--state', action='store_true', 
+                       help='Tampilkan snapshot status jaringan (dengan umur tiap field) dalam format JSON')
     parser.add_argument('--force-reconnect', action='store_true', 
                        help='Paksa reconnect sekarang')
+    session_group = parser.add_mutually_exclusive_group()
+    session_group.add_argument('--record', metavar='FILE',
+                       help='Rekam sesi HTTP ke file fixture (kredensial disensor)')
+    session_group.add_argument('--replay', metavar='FILE',
+                       help='Putar ulang sesi HTTP dari file fixture tanpa jaringan')
+    parser.add_argument('--replay-realtime', action='store_true',
+                       help='Gunakan timing asli saat replay')
+    parser.add_argument('--trace', action='store_true',
+                       help='Aktifkan trace mode (Chrome trace JSON + collapsed stacks ke trace_dir)')
+    parser.add_argument('--trace-sampling', action='store_true',
+                       help='Aktifkan juga sampling profiler saat trace')
     
     args = parser.parse_args()
     
-    auto_login = WiFiAutoLogin(args.config)
+    replay_dir = None
+    if args.replay:
+        from wifi_replay import make_replay_client
+        # Replay memakai config sementara tanpa file state, sehingga config asli
+        # (last_login_time) dan state yang dibaca daemon tidak tersentuh
+        replay_config = {}
+        if os.path.exists(args.config):
+            with open(args.config, 'r') as f:
+                replay_config = {key: value for key, value in json.load(f).items() if key.startswith('trace')}
+        replay_dir = tempfile.TemporaryDirectory(prefix='wifi_replay_')
+        auto_login = make_replay_client(args.replay, os.path.join(replay_dir.name, 'config.json'),
+                                        realtime=args.replay_realtime, config=replay_config)
+    elif args.record:
+        from wifi_replay import RecordingSession, verify_fixture
+        session = RecordingSession()
+        auto_login = WiFiAutoLogin(args.config, session=session)
+        session.secrets = [s for s in (auto_login.config.get('username'), auto_login.config.get('password')) if s]
+        session.meta['hotspot_url'] = auto_login.config.get('hotspot_url')
+        session.add_host(auto_login.config.get('hotspot_url'))
+    else:
+        auto_login = WiFiAutoLogin(args.config)
+    
+    if args.trace or args.trace_sampling:
+        auto_login.start_trace(sampling=args.trace_sampling or None)
     
+    try:
+        run_command(args, auto_login)
+    finally:
+        auto_login.stop_trace()
+        if args.record:
+            session.save(args.record)
+            logger.info(f"Sesi HTTP direkam ke: {args.record}")
+            # Pastikan sensor kredensial tidak merusak fixture
+            if any(entry['method'] == 'POST' for entry in session.entries):
+                problems = verify_fixture(session.to_fixture())
+                for problem in problems:
+                    logger.warning(f"Fixture mungkin tidak bisa di-replay: {problem}")
+                if not problems:
+                    logger.info("Fixture berhasil di-replay")
+        if replay_dir is not None:
+            replay_dir.cleanup()
+
+def run_command(args, auto_login):
+    """Jalankan perintah sesuai argumen"""
     if args.setup:
         # Setup konfigurasi
         print("=== Setup WiFi Auto Login ===")
@@ -325,6 +441,10 @@ def main():
         
         print("Konfigurasi berhasil disimpan!")
         
+    elif args.state:
+        # Tampilkan snapshot status jaringan
+        print(auto_login.network_state.to_json())
+        
     elif args.status:
         # Tampilkan status
         status = auto_login.get_status_info()
@@ -26,6 +26,7 @@ show_help() {
     echo "  uninstall       - Hapus service dan file konfigurasi"
     echo "  service-status  - Cek status service systemd"
     echo "  logs            - Tampilkan log"
+    echo "  trace           - Toggle trace mode pada service yang berjalan (SIGUSR2)"
     echo "  help            - Tampilkan bantuan ini"
     echo ""
     echo "Contoh:"
@@ -168,6 +169,7 @@ User=$USER
 ExecStart=/usr/bin/python3 $PYTHON_SCRIPT --daemon
 Restart=always
 RestartSec=10
+RuntimeDirectory=wifi_auto_login
 StandardOutput=journal
 StandardError=journal
 
@@ -232,6 +234,16 @@ show_logs() {
     fi
 }
 
+# Fungsi untuk toggle trace mode pada service
+toggle_trace() {
+    if systemctl is-active --quiet wifi-auto-login.service; then
+        sudo systemctl kill -s USR2 wifi-auto-login.service
+        echo "Trace mode di-toggle. Saat dimatikan, trace ditulis ke trace_dir (default: /var/log/wifi_auto_login_trace)"
+    else
+        echo "Status: Service tidak berjalan"
+    fi
+}
+
 # Main script
 case "${1:-help}" in
     setup)
@@ -261,6 +273,9 @@ case "${1:-help}" in
     logs)
         show_logs
         ;;
+    trace)
+        toggle_trace
+        ;;
     help|--help|-h)
         show_help
         ;;
@@ -8,13 +8,20 @@ import subprocess
 import re
 import json
 import os
+import sys
+
+from wifi_trace import TRACER, DEFAULT_TRACE_DIR, span, stop_and_dump
+
+def run_subprocess(command):
+    """Jalankan command dengan span trace per subprocess"""
+    with span('subprocess', command=' '.join(command)):
+        return subprocess.run(command, capture_output=True, text=True, timeout=10)
 
 def get_wifi_interfaces():
     """Dapatkan daftar interface WiFi"""
     try:
         # Gunakan ip link untuk mendapatkan interface
-        result = subprocess.run(['ip', 'link', 'show'], 
-                              capture_output=True, text=True, timeout=10)
+        result = run_subprocess(['ip', 'link', 'show'])
         
         interfaces = []
         for line in result.stdout.split('\n'):
@@ -41,12 +48,10 @@ def get_current_wifi_network(interface=None):
         # Gunakan iwgetid atau iw untuk mendapatkan SSID
         try:
             # Coba iwgetid dulu
-            result = subprocess.run(['iwgetid', '-r', interface], 
-                                  capture_output=True, text=True, timeout=10)
+            result = run_subprocess(['iwgetid', '-r', interface])
         except FileNotFoundError:
             # Fallback ke iw
-            result = subprocess.run(['iw', 'dev', interface, 'info'], 
-                                  capture_output=True, text=True, timeout=10)
+            result = run_subprocess(['iw', 'dev', interface, 'info'])
             if result.returncode == 0:
                 # Parse output iw untuk mendapatkan SSID
                 for line in result.stdout.split('\n'):
@@ -59,8 +64,7 @@ def get_current_wifi_network(interface=None):
             ssid = result.stdout.strip()
             
             # Dapatkan informasi tambahan dengan iwconfig
-            iw_result = subprocess.run(['iwconfig', interface], 
-                                     capture_output=True, text=True, timeout=10)
+            iw_result = run_subprocess(['iwconfig', interface])
             
             info = {
                 'interface': interface,
@@ -94,12 +98,38 @@ def get_current_wifi_network(interface=None):
         print(f"Error getting WiFi network info: {e}")
         return None
 
-def check_hotspot_connection():
-    """Cek apakah terhubung ke hotspot yang memerlukan login"""
+def check_internet_connection(session=None):
+    """Cek apakah sudah terhubung ke internet
+    
+    Satu-satunya probe untuk field 'connected'; dipakai juga oleh daemon login
+    dengan session miliknya.
+    """
+    import requests
+    
+    session = session or requests
+    # Coba akses Google DNS, lalu Cloudflare DNS
+    for url in ['http://8.8.8.8', 'http://1.1.1.1']:
+        try:
+            with span('probe', url=url):
+                session.get(url, timeout=5)
+            return True
+        except Exception:
+            continue
+    
+    return False
+
+def check_hotspot_connection(session=None):
+    """Cek apakah terhubung ke hotspot yang memerlukan login
+    
+    Satu-satunya probe untuk field 'is_hotspot': True hanya jika request
+    di-redirect ke halaman login; request yang gagal tidak dihitung.
+    """
     try:
         # Coba akses situs yang biasanya diblokir oleh captive portal
         import requests
         
+        session = session or requests
+        
         # Test beberapa situs
         test_urls = [
             'http://www.google.com',
@@ -109,7 +139,8 @@ def check_hotspot_connection():
         
         for url in test_urls:
             try:
-                response = requests.get(url, timeout=5)
+                with span('probe', url=url):
+                    response = session.get(url, timeout=5)
                 # Jika redirect ke halaman login, berarti ada captive portal
                 if 'hotspot' in response.url.lower() or 'login' in response.url.lower():
                     return True
@@ -131,7 +162,7 @@ def get_network_info():
     }
     
     if info['wifi_interfaces']:
-        info['current_network'] = get_current_wifi_network()
+        info['current_network'] = get_current_wifi_network(info['wifi_interfaces'][0])
         if info['current_network'] and info['current_network']['connected']:
             info['is_hotspot'] = check_hotspot_connection()
     
@@ -140,19 +171,50 @@ def get_network_info():
 def main():
     """Main function"""
     import argparse
+    from wifi_state import DEFAULT_STATE_FILE
     
     parser = argparse.ArgumentParser(description='WiFi Network Detector')
     parser.add_argument('--json', action='store_true', 
                        help='Output dalam format JSON')
     parser.add_argument('--interface', 
                        help='Interface WiFi spesifik')
+    parser.add_argument('--state', action='store_true', 
+                       help='Tampilkan snapshot status jaringan (dengan umur tiap field) dalam format JSON')
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE, 
+                       help='File state yang dipakai bersama dengan daemon login')
+    parser.add_argument('--trace', action='store_true', 
+                       help='Aktifkan trace mode (span subprocess dan probe) dan tulis ke --trace-dir')
+    parser.add_argument('--trace-sampling', action='store_true', 
+                       help='Aktifkan juga sampling profiler saat trace')
+    parser.add_argument('--trace-dir', default=DEFAULT_TRACE_DIR, 
+                       help='Direktori output trace')
     
     args = parser.parse_args()
     
+    if args.trace or args.trace_sampling:
+        TRACER.start(sampling=args.trace_sampling)
+    try:
+        detect(args)
+    finally:
+        for path in stop_and_dump(args.trace_dir):
+            print(f"Trace ditulis ke: {path}", file=sys.stderr)
+
+def detect(args):
+    """Deteksi dan tampilkan informasi network sesuai argumen"""
+    from wifi_state import NetworkState
+    
+    # Pakai snapshot bersama agar hasil cek yang masih segar tidak diulang
+    state = NetworkState(state_file=args.state_file, interface=args.interface)
+    
+    if args.state:
+        print(state.to_json())
+        return
+    
     if args.interface:
-        network_info = get_current_wifi_network(args.interface)
+        network_info = state.get('network')
         if network_info:
-            network_info['is_hotspot'] = check_hotspot_connection()
+            network_info = dict(network_info)
+            network_info['is_hotspot'] = state.get('is_hotspot')
         else:
             network_info = {
                 'interface': args.interface,
@@ -161,7 +223,7 @@ def main():
                 'is_hotspot': False
             }
     else:
-        network_info = get_network_info()
+        network_info = state.network_info()
     
     if args.json:
         print(json.dumps(network_info, indent=2))
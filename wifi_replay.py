@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+WiFi Portal Record/Replay
+Untuk merekam sesi login portal asli dan memutarnya ulang secara offline
+sebagai fixture regresi dan benchmark
+"""
+
+import gzip
+import html
+import json
+import logging
+import os
+import re
+import sys
+import time
+import tempfile
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, quote_plus
+
+import requests
+
+FIXTURE_VERSION = 1
+REDACTED = '<REDACTED>'
+
+logger = logging.getLogger(__name__)
+
+# Nama field form yang nilainya selalu disensor saat merekam
+SECRET_FIELDS = ['password', 'passwd', 'pass', 'username', 'user', 'email', 'login']
+
+
+class ReplayMismatch(requests.exceptions.ConnectionError):
+    """Request tidak ada di fixture (setara dengan tidak ada jaringan)"""
+
+
+def load_fixture(path):
+    """Muat fixture dari file JSON (boleh .gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        fixture = json.load(f)
+    if fixture.get('version') != FIXTURE_VERSION:
+        raise ValueError(f"Versi fixture tidak didukung: {fixture.get('version')}")
+    return fixture
+
+
+def save_fixture(fixture, path):
+    """Simpan fixture ke file JSON ringkas (gzip jika berakhiran .gz)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixture, f, separators=(',', ':'))
+
+
+def secret_variants(secrets):
+    """Semua bentuk kredensial yang mungkin muncul: asli, URL-encoded dan HTML-escaped"""
+    variants = set()
+    for secret in secrets:
+        if secret:
+            variants.update({secret, quote(secret), quote(secret, safe=''), quote_plus(secret), html.escape(secret)})
+    return sorted(variants, key=len, reverse=True)
+
+
+def secret_pattern(secrets):
+    """Regex kredensial (semua bentuk) yang berdiri sendiri, bukan bagian kata lain"""
+    patterns = []
+    for variant in secret_variants(secrets):
+        pattern = re.escape(variant)
+        if re.match(r'\w', variant):
+            pattern = r'(?<!\w)' + pattern
+        if re.search(r'\w$', variant):
+            pattern += r'(?!\w)'
+        patterns.append(pattern)
+    return re.compile('|'.join(patterns)) if patterns else None
+
+
+def redact_text(text, secrets, hosts=()):
+    """Ganti kredensial yang berdiri sendiri dalam teks
+
+    Hostname yang dikunjungi selama sesi (misal hotspot.padang.go.id) tidak
+    disentuh walaupun memuat kredensial, agar URL tetap bisa di-replay.
+    """
+    pattern = secret_pattern(secrets)
+    if not text or pattern is None:
+        return text
+    if not hosts:
+        return pattern.sub(REDACTED, text)
+
+    host_re = re.compile('|'.join(re.escape(host) for host in sorted(hosts, key=len, reverse=True)), re.I)
+    parts = []
+    last = 0
+    for match in host_re.finditer(text):
+        parts.append(pattern.sub(REDACTED, text[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(pattern.sub(REDACTED, text[last:]))
+    return ''.join(parts)
+
+
+def redact_url(url, secrets=()):
+    """Sensor segmen path dan parameter query URL yang berisi kredensial"""
+    variants = secret_variants(secrets)
+    parts = urlsplit(url)
+    if variants:
+        segments = [REDACTED if segment in variants else segment for segment in parts.path.split('/')]
+        parts = parts._replace(path='/'.join(segments))
+    if parts.query:
+        query = [
+            (name, REDACTED if name.lower() in SECRET_FIELDS or value in secrets else value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        ]
+        parts = parts._replace(query=urlencode(query, safe='<>'))
+    return urlunsplit(parts)
+
+
+TAG_RE = re.compile(r'<[^>]*>')
+ATTR_RE = re.compile(r'''([\w:.-]+)(\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+
+
+def _looks_like_url(value):
+    return '://' in value or value.startswith(('/', '?'))
+
+
+def redact_html(text, secrets, hosts=()):
+    """Sensor kredensial di halaman HTML hanya di tempat kredensial bisa muncul
+
+    Teks di antara tag disensor per kata, nilai atribut hanya jika seluruh
+    nilainya kredensial (atau parameter URL-nya), sehingga nama field seperti
+    name="username" tidak rusak walaupun username-nya "user".
+    """
+    variants = set(secret_variants(secrets))
+    if not text or not variants:
+        return text
+
+    def redact_attribute(match):
+        name, equals = match.group(1), match.group(2)
+        quote_char = '"' if match.group(3) is not None else "'" if match.group(4) is not None else ''
+        value = next(group for group in match.group(3, 4, 5) if group is not None)
+        if value in variants:
+            value = REDACTED
+        elif _looks_like_url(value):
+            value = redact_url(value, secrets)
+        return f"{name}{equals}{quote_char}{value}{quote_char}"
+
+    parts = []
+    last = 0
+    for match in TAG_RE.finditer(text):
+        parts.append(redact_text(text[last:match.start()], secrets, hosts))
+        parts.append(ATTR_RE.sub(redact_attribute, match.group(0)))
+        last = match.end()
+    parts.append(redact_text(text[last:], secrets, hosts))
+    return ''.join(parts)
+
+
+class RecordingSession(requests.Session):
+    """Session yang merekam setiap request/response dengan kredensial disensor"""
+
+    def __init__(self, secrets=None):
+        super().__init__()
+        self.secrets = [s for s in (secrets or []) if s]
+        self.hosts = set()
+        self.meta = {}
+        self.entries = []
+        self._submitted = False
+        self._start = time.monotonic()
+
+    def add_host(self, url):
+        """Daftarkan hostname URL agar tidak ikut disensor"""
+        host = urlsplit(url or '').hostname
+        if host:
+            self.hosts.add(host)
+
+    def redact(self, text):
+        """Sensor kredensial dalam body, kecuali di hostname yang dikunjungi"""
+        if text and TAG_RE.search(text):
+            return redact_html(text, self.secrets, self.hosts)
+        return redact_text(text, self.secrets, self.hosts)
+
+    def _redact_header(self, value):
+        if _looks_like_url(value):
+            return redact_url(value, self.secrets)
+        return redact_text(value, self.secrets, self.hosts)
+
+    def _redact_data(self, data):
+        if isinstance(data, dict):
+            return {
+                key: REDACTED if key.lower() in SECRET_FIELDS or str(value) in self.secrets else value
+                for key, value in data.items()
+            }
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', 'replace')
+        if isinstance(data, str):
+            return redact_url('?' + data, self.secrets)[1:]
+        return None
+
+    def request(self, method, url, **kwargs):
+        offset = time.monotonic() - self._start
+        self.add_host(url)
+        entry = {
+            'method': method.upper(),
+            'url': redact_url(url, self.secrets),
+            'data': self._redact_data(kwargs.get('data')),
+            'offset': round(offset, 4)
+        }
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            entry['elapsed'] = round(time.monotonic() - self._start - offset, 4)
+            entry['error'] = type(e).__name__
+            self.entries.append(entry)
+            raise
+
+        entry['elapsed'] = round(time.monotonic() - self._start - offset, 4)
+        for redirect in response.history:
+            self.add_host(redirect.url)
+        self.add_host(response.url)
+
+        # Kredensial yang sudah muncul sebelum form dikirim kemungkinan bagian
+        # halaman biasa; sensornya bisa merusak fixture
+        pattern = secret_pattern(self.secrets)
+        if not self._submitted and pattern is not None and pattern.search(response.text):
+            logger.warning(f"Kredensial muncul di halaman sebelum login ({response.url}); "
+                           "periksa apakah fixture masih bisa di-replay")
+        if method.upper() == 'POST':
+            self._submitted = True
+        entry.update({
+            'status': response.status_code,
+            'final_url': redact_url(response.url, self.secrets),
+            'headers': {
+                key: self._redact_header(value) for key, value in response.headers.items()
+                if key.lower() not in ('set-cookie', 'content-encoding', 'content-length', 'transfer-encoding')
+            },
+            'encoding': response.encoding,
+            'body': self.redact(response.text)
+        })
+        self.entries.append(entry)
+        return response
+
+    def to_fixture(self):
+        """Kembalikan rekaman dalam format fixture"""
+        return {
+            'version': FIXTURE_VERSION,
+            'recorded_at': datetime.now().isoformat(),
+            'meta': self.meta,
+            'entries': self.entries
+        }
+
+    def save(self, path):
+        """Simpan rekaman ke file fixture"""
+        save_fixture(self.to_fixture(), path)
+
+
+class ReplaySession(requests.Session):
+    """Session yang melayani request dari fixture tanpa akses jaringan"""
+
+    def __init__(self, fixture, realtime=False, secrets=None):
+        super().__init__()
+        # Kredensial client replay disensor dengan cara yang sama seperti saat merekam
+        self.secrets = [s for s in (secrets or []) if s]
+        if isinstance(fixture, str):
+            fixture = load_fixture(fixture)
+        self.fixture = fixture
+        self.meta = fixture.get('meta', {})
+        self.entries = fixture['entries']
+        self.realtime = realtime
+        self.consumed = [False] * len(self.entries)
+        self.misses = []
+        self._start = time.monotonic()
+
+    def reset(self):
+        """Mulai ulang replay dari awal"""
+        self.consumed = [False] * len(self.entries)
+        self.misses = []
+        self._start = time.monotonic()
+        self.cookies.clear()
+
+    def remaining(self):
+        """Daftar entry yang belum diputar"""
+        return [entry for entry, used in zip(self.entries, self.consumed) if not used]
+
+    def _next_entry(self, method, url):
+        # Ambil entry berikutnya (sesuai urutan rekaman) yang cocok
+        for index, entry in enumerate(self.entries):
+            if not self.consumed[index] and entry['method'] == method and entry['url'] == url:
+                self.consumed[index] = True
+                return entry
+        return None
+
+    def _wait(self, entry):
+        # Tunggu sampai waktu asli response selesai
+        target = entry.get('offset', 0) + entry.get('elapsed', 0)
+        delay = target - (time.monotonic() - self._start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        entry = self._next_entry(method, redact_url(url, self.secrets))
+        if entry is None:
+            self.misses.append((method, url))
+            raise ReplayMismatch(f"Tidak ada rekaman untuk {method} {url}")
+
+        if self.realtime:
+            self._wait(entry)
+
+        if 'error' in entry:
+            error_class = getattr(requests.exceptions, entry['error'], requests.exceptions.ConnectionError)
+            raise error_class(f"Replay error untuk {method} {url}")
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['final_url']
+        response.headers.update(entry.get('headers', {}))
+        response.encoding = entry.get('encoding') or 'utf-8'
+        response._content = (entry.get('body') or '').encode(response.encoding, 'replace')
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+def make_replay_client(fixture, config_file, realtime=False, config=None):
+    """Buat WiFiAutoLogin yang memakai ReplaySession; config ditulis ke config_file"""
+    from wifi_auto_login import WiFiAutoLogin
+
+    if isinstance(fixture, str):
+        fixture = load_fixture(fixture)
+    client_config = {
+        'hotspot_url': fixture.get('meta', {}).get('hotspot_url', 'http://hotspot.padang.go.id'),
+        'username': 'replay',
+        'password': 'replay',
+        'timeout': 10,
+        'state_file': None
+    }
+    client_config.update(config or {})
+    session = ReplaySession(fixture, realtime=realtime,
+                            secrets=[client_config['username'], client_config['password']])
+
+    with open(config_file, 'w') as f:
+        json.dump(client_config, f)
+
+    return WiFiAutoLogin(config_file, session=session)
+
+
+def verify_fixture(fixture):
+    """Replay login() sekali dari fixture; kembalikan daftar masalah (kosong jika lolos)"""
+    with tempfile.TemporaryDirectory(prefix='wifi_replay_') as config_dir:
+        client = make_replay_client(fixture, os.path.join(config_dir, 'config.json'))
+        ok = client.login()
+
+    problems = [f"Request tidak ada di fixture: {method} {url}" for method, url in client.session.misses]
+    if not ok:
+        problems.append("login() gagal saat replay")
+    return problems
+
+
+def benchmark_fixture(path, config_file, iterations=20):
+    """Benchmark find_login_form, submit_login dan login() terhadap satu fixture"""
+    client = make_replay_client(path, config_file)
+    session = client.session
+    timings = {'get_hotspot_login_page': [], 'find_login_form': [], 'submit_login': [], 'login': []}
+    success = 0
+
+    for _ in range(iterations):
+        session.reset()
+        start = time.perf_counter()
+        response = client.get_hotspot_login_page()
+        timings['get_hotspot_login_page'].append(time.perf_counter() - start)
+        if not response:
+            continue
+
+        start = time.perf_counter()
+        form = client.find_login_form(response)
+        timings['find_login_form'].append(time.perf_counter() - start)
+        if not form:
+            continue
+
+        start = time.perf_counter()
+        client.submit_login(form, response)
+        timings['submit_login'].append(time.perf_counter() - start)
+
+        session.reset()
+        start = time.perf_counter()
+        if client.login():
+            success += 1
+        timings['login'].append(time.perf_counter() - start)
+
+    return {
+        'fixture': path,
+        'iterations': iterations,
+        'success': success,
+        'timings_ms': {
+            name: {
+                'min': round(min(values) * 1000, 3),
+                'avg': round(sum(values) / len(values) * 1000, 3),
+                'max': round(max(values) * 1000, 3)
+            }
+            for name, values in timings.items() if values
+        }
+    }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay dan benchmark fixture portal WiFi')
+    parser.add_argument('fixtures', nargs='+',
+                       help='File fixture hasil rekaman (--record)')
+    parser.add_argument('--iterations', type=int, default=20,
+                       help='Jumlah iterasi per fixture')
+    parser.add_argument('--realtime', action='store_true',
+                       help='Putar ulang dengan timing asli (hanya login sekali)')
+    parser.add_argument('--json', action='store_true',
+                       help='Output dalam format JSON')
+
+    args = parser.parse_args()
+
+    # Log per-request dari WiFiAutoLogin hanya mengganggu output benchmark
+    logging.getLogger('wifi_auto_login').setLevel(logging.WARNING)
+
+    failed = False
+    results = []
+    config_dir = tempfile.TemporaryDirectory(prefix='wifi_replay_')
+    config_file = os.path.join(config_dir.name, 'config.json')
+    for path in args.fixtures:
+        if args.realtime:
+            client = make_replay_client(path, config_file, realtime=True)
+            start = time.perf_counter()
+            ok = client.login()
+            results.append({
+                'fixture': path,
+                'success': int(ok),
+                'elapsed_s': round(time.perf_counter() - start, 3)
+            })
+            failed = failed or not ok
+        else:
+            result = benchmark_fixture(path, config_file, args.iterations)
+            results.append(result)
+            failed = failed or result['success'] != args.iterations
+
+    config_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"=== {result['fixture']} ===")
+            if 'elapsed_s' in result:
+                print(f"Login: {'berhasil' if result['success'] else 'gagal'} ({result['elapsed_s']} s)")
+                continue
+            print(f"Login berhasil: {result['success']}/{result['iterations']}")
+            for name, stats in result['timings_ms'].items():
+                print(f"  {name}: min {stats['min']} ms, avg {stats['avg']} ms, max {stats['max']} ms")
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
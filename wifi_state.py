@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+WiFi Network State
+Snapshot status jaringan (interface, SSID, sinyal, koneksi internet, captive
+portal) dengan cache TTL per field, dipakai bersama oleh wifi_detector dan
+daemon login melalui file state
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import wifi_detector
+
+logger = logging.getLogger(__name__)
+
+# Direktori runtime milik service (RuntimeDirectory systemd), bukan /tmp
+DEFAULT_STATE_FILE = '/run/wifi_auto_login/state.json'
+
+# TTL default per field (detik)
+DEFAULT_TTL = {
+    'interfaces': 300,
+    'network': 30,
+    'connected': 15,
+    'is_hotspot': 30
+}
+
+FIELDS = list(DEFAULT_TTL)
+
+
+class NetworkState:
+    """Snapshot status jaringan; field hanya di-refresh jika sudah kedaluwarsa"""
+
+    def __init__(self, ttl=None, state_file=DEFAULT_STATE_FILE, interface=None, checks=None):
+        self.ttl = dict(DEFAULT_TTL)
+        self.ttl.update(ttl or {})
+        self.state_file = state_file
+        self.interface = interface
+        self.refreshers = {
+            'interfaces': wifi_detector.get_wifi_interfaces,
+            'network': self._refresh_network,
+            'connected': wifi_detector.check_internet_connection,
+            'is_hotspot': wifi_detector.check_hotspot_connection
+        }
+        self.refreshers.update(checks or {})
+        self._values = {}
+        self._updated = {}
+        self._lock = threading.RLock()
+
+    def _refresh_network(self):
+        interface = self.interface
+        if not interface:
+            interfaces = self.get('interfaces')
+            if not interfaces:
+                return None
+            interface = interfaces[0]  # Gunakan interface pertama
+        return wifi_detector.get_current_wifi_network(interface)
+
+    def age(self, field):
+        """Umur field dalam detik (None jika belum pernah diisi)"""
+        updated = self._updated.get(field)
+        return None if updated is None else time.time() - updated
+
+    def is_stale(self, field):
+        """Cek apakah field perlu di-refresh
+
+        Umur negatif (jam mundur, misal setelah sinkronisasi NTP) juga
+        dianggap kedaluwarsa.
+        """
+        age = self.age(field)
+        return age is None or age < 0 or age >= self.ttl[field]
+
+    def get(self, field, refresh=True):
+        """Ambil nilai field, refresh dulu jika sudah kedaluwarsa"""
+        with self._lock:
+            if self.is_stale(field):
+                self.load()
+            if refresh and self.is_stale(field):
+                self.set(field, self.refreshers[field]())
+            return self._values.get(field)
+
+    def set(self, field, value):
+        """Isi field dengan nilai yang baru diketahui (misal hasil login)"""
+        with self._lock:
+            self.load()
+            self._values[field] = value
+            self._updated[field] = time.time()
+            self.save()
+
+    def invalidate(self, *fields):
+        """Tandai field (default: semua) agar di-refresh pada pembacaan berikutnya"""
+        with self._lock:
+            for field in fields or FIELDS:
+                self._updated.pop(field, None)
+            self.save()
+
+    def load(self):
+        """Ambil field yang lebih baru dari file state bersama"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            # Hanya percayai file milik root atau user ini yang tidak bisa ditulis orang lain
+            stat = os.stat(self.state_file)
+            if stat.st_uid not in (0, os.getuid()) or stat.st_mode & 0o022:
+                logger.warning(f"Mengabaikan file state yang tidak aman: {self.state_file}")
+                return
+            with open(self.state_file, 'r') as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.debug(f"Error loading network state: {e}")
+            return
+
+        now = time.time()
+        for field, entry in stored.get('fields', {}).items():
+            if field not in self.ttl:
+                continue
+            updated = entry.get('updated', 0)
+            if not isinstance(updated, (int, float)) or updated > now:
+                continue
+            value = entry.get('value')
+            if field == 'network' and self.interface and (value or {}).get('interface') != self.interface:
+                continue
+            if updated > self._updated.get(field, 0):
+                self._values[field] = value
+                self._updated[field] = updated
+
+    def save(self):
+        """Tulis snapshot ke file state bersama (atomic)"""
+        if not self.state_file:
+            return
+        data = {
+            'fields': {
+                field: {'value': self._values.get(field), 'updated': self._updated[field]}
+                for field in FIELDS if field in self._updated
+            }
+        }
+        try:
+            directory = os.path.dirname(self.state_file) or '.'
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.wifi_state_')
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            logger.debug(f"Error saving network state: {e}")
+
+    def refresh(self, *fields):
+        """Refresh field yang kedaluwarsa (default: semua)"""
+        for field in fields or FIELDS:
+            self.get(field)
+
+    def snapshot(self, refresh=True):
+        """Snapshot semua field beserta umurnya"""
+        with self._lock:
+            if refresh:
+                self.refresh()
+            else:
+                self.load()
+            return {
+                field: {
+                    'value': self._values.get(field),
+                    'age': None if self.age(field) is None else round(self.age(field), 3),
+                    'ttl': self.ttl[field],
+                    'stale': self.is_stale(field)
+                }
+                for field in FIELDS
+            }
+
+    def to_json(self, refresh=True, indent=2):
+        """Snapshot dalam format JSON"""
+        return json.dumps(self.snapshot(refresh), indent=indent)
+
+    def network_info(self):
+        """Informasi network dalam format get_network_info()"""
+        info = {
+            'wifi_interfaces': self.get('interfaces'),
+            'current_network': None,
+            'is_hotspot': False
+        }
+
+        if info['wifi_interfaces'] or self.interface:
+            info['current_network'] = self.get('network')
+            if info['current_network'] and info['current_network']['connected']:
+                info['is_hotspot'] = self.get('is_hotspot')
+
+        return info
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+WiFi Auto Login Tracer
+Untuk profiling daemon: span monotonic dalam format Chrome trace-event
+dan collapsed stacks (flame graph), plus sampling profiler CPU opsional
+"""
+
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_DIR = '/var/log/wifi_auto_login_trace'
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Pengumpul span dan sample; tidak melakukan apa-apa saat tidak aktif"""
+
+    def __init__(self, max_events=100000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.stacks = Counter()
+        self.samples = Counter()
+        self._local = threading.local()
+        self._origin = time.monotonic()
+        self._previous_prof_handler = None
+        self._getaddrinfo = None
+        self.toggle_requested = False
+
+    def start(self, sampling=False, interval=0.005):
+        """Aktifkan tracing (dan sampling profiler jika diminta)"""
+        if self.enabled:
+            return
+        self.clear()
+        self.enabled = True
+
+        # Bungkus DNS lookup agar waktunya terlihat sebagai span sendiri
+        self._getaddrinfo = socket.getaddrinfo
+        original = self._getaddrinfo
+
+        @functools.wraps(original)
+        def getaddrinfo(host, *args, **kwargs):
+            with self.span('dns', host=str(host)):
+                return original(host, *args, **kwargs)
+
+        socket.getaddrinfo = getaddrinfo
+
+        if sampling:
+            # Sampling berdasarkan waktu CPU (ITIMER_PROF), jadi waktu tidur
+            # daemon tidak ikut tercatat; hanya bisa dari main thread
+            try:
+                self._previous_prof_handler = signal.signal(signal.SIGPROF, self._sample)
+                signal.setitimer(signal.ITIMER_PROF, interval, interval)
+            except ValueError as e:
+                logger.warning(f"Sampling profiler tidak bisa diaktifkan: {e}")
+                sampling = False
+        logger.info(f"Trace mode aktif (sampling: {'ya' if sampling else 'tidak'})")
+
+    def stop(self):
+        """Matikan tracing; data yang terkumpul tetap tersedia"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._getaddrinfo is not None:
+            socket.getaddrinfo = self._getaddrinfo
+            self._getaddrinfo = None
+        if self._previous_prof_handler is not None:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_prof_handler)
+            self._previous_prof_handler = None
+        logger.info("Trace mode dimatikan")
+
+    def clear(self):
+        """Hapus semua span dan sample"""
+        self.events.clear()
+        self.stacks.clear()
+        self.samples.clear()
+        self._origin = time.monotonic()
+
+    def span(self, name, **args):
+        """Context manager untuk satu span; gratis saat tracing mati"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, args, start, end, path, self_time):
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_native_id()
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+        self.stacks[path] += self_time
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.samples[';'.join(reversed(names))] += 1
+
+    def chrome_trace(self):
+        """Span dalam format Chrome trace-event (chrome://tracing, Perfetto)"""
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def collapsed_stacks(self):
+        """Span dalam format collapsed stacks (self time dalam mikrodetik)"""
+        return [f"{path} {round(value * 1e6)}" for path, value in sorted(self.stacks.items())]
+
+    def collapsed_samples(self):
+        """Hasil sampling profiler dalam format collapsed stacks"""
+        return [f"{path} {count}" for path, count in sorted(self.samples.items())]
+
+    def dump(self, directory=DEFAULT_TRACE_DIR):
+        """Tulis trace ke direktori, kembalikan daftar file yang ditulis"""
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, 'trace-' + datetime.now().strftime('%Y%m%d-%H%M%S-%f'))
+        outputs = {
+            prefix + '.json': json.dumps(self.chrome_trace()),
+            prefix + '.folded': '\n'.join(self.collapsed_stacks()) + '\n'
+        }
+        if self.samples:
+            outputs[prefix + '.samples.folded'] = '\n'.join(self.collapsed_samples()) + '\n'
+
+        for path, content in outputs.items():
+            with open(path, 'w') as f:
+                f.write(content)
+        return list(outputs)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start', 'child_time')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.child_time = 0.0
+        self.tracer._stack().append(self)
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.monotonic()
+        stack = self.tracer._stack()
+        path = ';'.join(span.name for span in stack)
+        stack.pop()
+        duration = end - self.start
+        if stack:
+            stack[-1].child_time += duration
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.args, self.start, end, path, duration - self.child_time)
+        return False
+
+
+TRACER = Tracer()
+
+
+def span(name, **args):
+    """Span pada tracer global"""
+    return TRACER.span(name, **args)
+
+
+def traced(name):
+    """Decorator: bungkus fungsi dalam span bernama"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install_signal_handler(signum=signal.SIGUSR2):
+    """Minta toggle trace mode dengan signal (default SIGUSR2)
+
+    Handler hanya memasang flag; toggle dijalankan oleh handle_toggle_request()
+    dari loop daemon.
+    """
+    def handler(signum, frame):
+        TRACER.toggle_requested = True
+
+    signal.signal(signum, handler)
+
+
+def handle_toggle_request(directory=DEFAULT_TRACE_DIR, sampling=False, interval=0.005):
+    """Jalankan toggle yang diminta lewat signal; trace ditulis saat dimatikan"""
+    if not TRACER.toggle_requested:
+        return []
+    TRACER.toggle_requested = False
+
+    if not TRACER.enabled:
+        TRACER.start(sampling=sampling, interval=interval)
+        return []
+
+    return stop_and_dump(directory)
+
+
+def stop_and_dump(directory=DEFAULT_TRACE_DIR):
+    """Matikan trace mode dan tulis hasilnya; kembalikan daftar file yang ditulis"""
+    if not TRACER.enabled:
+        return []
+    TRACER.stop()
+    try:
+        paths = TRACER.dump(directory)
+    except Exception as e:
+        logger.error(f"Error writing trace: {e}")
+        return []
+    for path in paths:
+        logger.info(f"Trace ditulis ke: {path}")
+    return paths